@@ -2,10 +2,23 @@ from flask import Flask, request, jsonify, render_template_string
 from flask_cors import CORS
 import os
 import pickle
+import queue
+import threading
+import time
 import numpy as np
 import pandas as pd
 import joblib
+from sklearn.preprocessing import StandardScaler
 from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    print("⚠ orjson not installed - falling back to stdlib json responses")
+    orjson = None
+
+import json
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for web app integration
@@ -13,6 +26,7 @@ CORS(app)  # Enable CORS for web app integration
 # Store loaded models in memory
 MODELS = {}
 SCALERS = {}
+SCALER_PARAMS = {}  # model_name -> (mean, 1/scale) as float32 arrays
 
 # Model configurations - Update this with your actual models
 MODEL_CONFIG = {
@@ -39,45 +53,219 @@ MODEL_CONFIG = {
     }
 }
 
+def _load_scaler(scaler_path):
+    """Load a StandardScaler, preferring an .npz sidecar: rebuilding the
+    scaler from plain arrays is a single mmap instead of running the pickle
+    VM, and it removes the pickle trust problem for these tiny files"""
+    npz_path = scaler_path.with_suffix('.npz')
+    if npz_path.exists():
+        z = np.load(npz_path, mmap_mode='r')
+        scaler = StandardScaler()
+        scaler.mean_ = z['mean']
+        scaler.scale_ = z['scale']
+        scaler.var_ = z['var']
+        scaler.n_features_in_ = len(z['mean'])
+        return scaler
+
+    with open(scaler_path, 'rb') as f:
+        scaler = pickle.load(f)
+    # Migrate once so future startups skip pickle entirely
+    try:
+        np.savez(npz_path, mean=scaler.mean_, scale=scaler.scale_, var=scaler.var_)
+    except Exception:
+        pass
+    return scaler
+
+def _load_single_model(model_name, config, models_dir):
+    """Load one model (and its scaler) into the global registries"""
+    # First check if it's an absolute path or relative to current directory
+    if 'task3' in config['file']:
+        model_path = Path(config['file'])
+    else:
+        model_path = models_dir / config['file']
+
+    if not model_path.exists():
+        print(f"⚠ Model file not found: {model_path}")
+        return
+
+    try:
+        try:
+            # mmap the numpy arrays inside the estimator so workers share
+            # page-cache pages instead of each unpickling a private copy
+            MODELS[model_name] = joblib.load(model_path, mmap_mode='r')
+        except Exception:
+            with open(model_path, 'rb') as f:
+                MODELS[model_name] = pickle.load(f)
+
+        # Tree ensembles traverse their estimators in parallel when n_jobs
+        # is set; saved models may predate training with n_jobs=-1
+        if hasattr(MODELS[model_name], 'n_jobs'):
+            MODELS[model_name].n_jobs = -1
+
+        # Load scaler if specified
+        if 'scaler_file' in config:
+            scaler_path = Path(config['scaler_file'])
+            if scaler_path.exists() or scaler_path.with_suffix('.npz').exists():
+                scaler = _load_scaler(scaler_path)
+                SCALERS[model_name] = scaler
+                # Cache mean and reciprocal scale so the hot path can fuse
+                # (X - mean) * inv_scale in place instead of calling transform
+                SCALER_PARAMS[model_name] = (
+                    np.asarray(scaler.mean_, dtype=np.float32),
+                    1.0 / np.asarray(scaler.scale_, dtype=np.float32)
+                )
+                print(f"✓ Loaded scaler for: {model_name}")
+
+        print(f"✓ Loaded model: {model_name}")
+    except Exception as e:
+        print(f"✗ Failed to load {model_name}: {str(e)}")
+
 def load_models():
-    """Load all available models at startup"""
+    """Load all available models at startup, in parallel so startup time
+    is the slowest model instead of the sum of all of them"""
     models_dir = Path('models')
     if not models_dir.exists():
         models_dir.mkdir()
-        
-    for model_name, config in MODEL_CONFIG.items():
-        # First check if it's an absolute path or relative to current directory
-        if 'task3' in config['file']:
-            model_path = Path(config['file'])
-        else:
-            model_path = models_dir / config['file']
-            
-        if model_path.exists():
-            try:
-                # Try different loading methods
-                if model_path.suffix == '.pkl':
-                    with open(model_path, 'rb') as f:
-                        MODELS[model_name] = pickle.load(f)
-                elif model_path.suffix == '.joblib':
-                    MODELS[model_name] = joblib.load(model_path)
-                    
-                # Load scaler if specified
-                if 'scaler_file' in config:
-                    scaler_path = Path(config['scaler_file'])
-                    if scaler_path.exists():
-                        with open(scaler_path, 'rb') as f:
-                            SCALERS[model_name] = pickle.load(f)
-                        print(f"✓ Loaded scaler for: {model_name}")
-                        
-                print(f"✓ Loaded model: {model_name}")
-            except Exception as e:
-                print(f"✗ Failed to load {model_name}: {str(e)}")
-        else:
-            print(f"⚠ Model file not found: {model_path}")
+
+    with ThreadPoolExecutor(max_workers=max(len(MODEL_CONFIG), 1)) as pool:
+        for model_name, config in MODEL_CONFIG.items():
+            pool.submit(_load_single_model, model_name, config, models_dir)
+
+    _rebuild_models_status()
+
+# /models is a read-heavy status endpoint; precompute its payload once at
+# startup and rebuild only when models are (re)loaded
+_MODELS_STATUS_CACHE = {}
+
+def _rebuild_models_status():
+    global _MODELS_STATUS_CACHE
+    available_models = {}
+    for name, config in MODEL_CONFIG.items():
+        available_models[name] = {
+            'loaded': name in MODELS,
+            'type': config['type'],
+            'description': config['description']
+        }
+    _MODELS_STATUS_CACHE = {
+        'available_models': available_models,
+        'total_models': len(MODEL_CONFIG),
+        'loaded_models': len(MODELS)
+    }
 
 # Load models on startup
 load_models()
 
+def _scale_inplace(model_name, X):
+    """Standard-scale X in place via the cached (mean, inv_scale) arrays,
+    avoiding sklearn's transform validation and its two temporaries"""
+    params = SCALER_PARAMS.get(model_name)
+    if params is None:
+        return X
+    mean, inv_scale = params
+    np.subtract(X, mean, out=X)
+    np.multiply(X, inv_scale, out=X)
+    return X
+
+def _np_default(obj):
+    """stdlib-json fallback encoder for numpy arrays and scalars"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f'Object of type {type(obj)} is not JSON serializable')
+
+def ojsonify(obj, status=200):
+    """jsonify replacement that serializes numpy arrays in C via orjson"""
+    if orjson is not None:
+        body = orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        body = json.dumps(obj, default=_np_default)
+    return app.response_class(body, status=status, mimetype='application/json')
+
+# Per-thread reusable feature buffers: handlers refill the same array in
+# place instead of allocating a fresh one per request, which keeps the
+# allocator and GC quiet under sustained QPS
+_BUFFERS = threading.local()
+
+def _request_buffer(n_rows, n_features):
+    """Return a (n_rows, n_features) float32 view over this thread's
+    buffer, growing it with a 2x policy when a bigger batch arrives"""
+    buf = getattr(_BUFFERS, 'buf', None)
+    if buf is None or buf.shape[1] != n_features:
+        buf = np.empty((n_rows, n_features), dtype=np.float32)
+        _BUFFERS.buf = buf
+    elif buf.shape[0] < n_rows:
+        buf = np.empty((max(n_rows, buf.shape[0] * 2), n_features), dtype=np.float32)
+        _BUFFERS.buf = buf
+    return buf[:n_rows]
+
+# Micro-batching for /predict/<model_name>: concurrent single-sample requests
+# are drained into one model.predict call to amortize sklearn dispatch cost
+PREDICT_MAX_BATCH = int(os.environ.get('PREDICT_MAX_BATCH', 64))
+PREDICT_MAX_LATENCY_MS = float(os.environ.get('PREDICT_MAX_LATENCY_MS', 10))
+
+_BATCH_QUEUES = {}
+_BATCH_LOCK = threading.Lock()
+
+def _batch_worker(model_name, q):
+    """Drain up to PREDICT_MAX_BATCH queued requests (waiting at most
+    PREDICT_MAX_LATENCY_MS for stragglers), run one predict over the
+    stacked matrix and fan results back out to the waiting futures"""
+    wait_s = PREDICT_MAX_LATENCY_MS / 1000.0
+    while True:
+        item = q.get()
+        batch = [item]
+        deadline = time.monotonic() + wait_s
+        while len(batch) < PREDICT_MAX_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(q.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        try:
+            model = MODELS[model_name]
+            stacked = np.vstack([f for f, _, _ in batch])
+            stacked = _scale_inplace(model_name, stacked)
+
+            predictions = model.predict(stacked)
+            # The probability traversal nearly doubles inference cost, so
+            # only run it when at least one request in the batch asked
+            need_proba = hasattr(model, 'predict_proba') and any(w for _, w, _ in batch)
+            probabilities = model.predict_proba(stacked) if need_proba else None
+
+            row = 0
+            for f, want_proba, fut in batch:
+                n = f.shape[0]
+                fut.set_result((
+                    predictions[row:row + n],
+                    probabilities[row:row + n] if (probabilities is not None and want_proba) else None
+                ))
+                row += n
+        except Exception as e:
+            for _, _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+
+def _submit_prediction(model_name, features, want_proba=False):
+    """Queue a feature matrix for batched prediction; returns a Future
+    resolving to (predictions, probabilities)"""
+    with _BATCH_LOCK:
+        q = _BATCH_QUEUES.get(model_name)
+        if q is None:
+            q = queue.Queue()
+            _BATCH_QUEUES[model_name] = q
+            threading.Thread(target=_batch_worker, args=(model_name, q), daemon=True).start()
+    future = Future()
+    q.put((features, want_proba, future))
+    return future
+
+def _wants_proba(data):
+    """Probabilities are opt-in via {"return_proba": true} or ?proba=1"""
+    return bool(data.get('return_proba')) or request.args.get('proba') == '1'
+
 # Enhanced HTML template
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -124,6 +312,7 @@ HTML_TEMPLATE = """
             <span class="method post">POST</span><strong>/predict/&lt;model_name&gt;</strong>
             <p>Make predictions using a specific model</p>
             <p><strong>Request body:</strong> <code>{"features": [val1, val2, ...]} or {"data": {...}}</code></p>
+            <p><strong>Optional:</strong> add <code>"return_proba": true</code> (or <code>?proba=1</code>) to include class probabilities</p>
             <p><strong>Example:</strong> <code>/predict/classification</code></p>
         </div>
         
@@ -131,6 +320,7 @@ HTML_TEMPLATE = """
             <span class="method post">POST</span><strong>/batch_predict/&lt;model_name&gt;</strong>
             <p>Make batch predictions for multiple samples</p>
             <p><strong>Request body:</strong> <code>{"samples": [[val1, val2], [val3, val4], ...]}</code></p>
+            <p><strong>Optional:</strong> add <code>"return_proba": true</code> (or <code>?proba=1</code>) to include class probabilities</p>
         </div>
         
         <div class="endpoint">
@@ -176,19 +366,8 @@ def home():
 
 @app.route('/models')
 def list_models():
-    """List all available models"""
-    available_models = {}
-    for name, config in MODEL_CONFIG.items():
-        available_models[name] = {
-            'loaded': name in MODELS,
-            'type': config['type'],
-            'description': config['description']
-        }
-    return jsonify({
-        'available_models': available_models,
-        'total_models': len(MODEL_CONFIG),
-        'loaded_models': len(MODELS)
-    })
+    """List all available models (precomputed at startup)"""
+    return jsonify(_MODELS_STATUS_CACHE)
 
 @app.route('/predict/<model_name>', methods=['POST'])
 def predict_single(model_name):
@@ -206,40 +385,46 @@ def predict_single(model_name):
         
         # Handle different input formats
         if 'features' in data:
-            features = np.array(data['features']).reshape(1, -1)
+            values = data['features']
         elif 'data' in data:
-            if isinstance(data['data'], list):
-                features = np.array(data['data']).reshape(1, -1)
-            else:
-                # Handle dictionary format
-                features = np.array(list(data['data'].values())).reshape(1, -1)
+            # Handle list or dictionary format
+            values = data['data'] if isinstance(data['data'], list) else list(data['data'].values())
         else:
             return jsonify({'error': 'Please provide data as "features" or "data" key'}), 400
-        
-        model = MODELS[model_name]
-        
-        # Apply scaling if scaler is available for this model
-        if model_name in SCALERS:
-            scaler = SCALERS[model_name]
-            features = scaler.transform(features)
-        
-        prediction = model.predict(features)
-        
+
+        # Reject wrong-width rows before enqueueing: a mismatched sample
+        # inside the shared batch would fail the vstack and poison every
+        # concurrent request batched with it
+        expected = getattr(MODELS[model_name], 'n_features_in_', None)
+        if expected is not None and len(values) != expected:
+            return jsonify({
+                'error': f'Model "{model_name}" expects {expected} features, got {len(values)}'
+            }), 400
+
+        # Fill this thread's pooled buffer in place instead of allocating
+        features = _request_buffer(1, len(values))
+        features[0, :] = values
+
+        # Scaling (if any) and prediction happen inside the batch worker so
+        # concurrent requests share a single sklearn call
+        prediction, probabilities = _submit_prediction(
+            model_name, features, want_proba=_wants_proba(data)
+        ).result(timeout=30)
+
         # Get prediction probability if available (for classifiers)
         result = {
             'model': model_name,
-            'prediction': prediction.tolist(),
+            'prediction': prediction,
             'input_shape': features.shape,
             'success': True
         }
-        
+
         # Add probabilities for classification models
-        if hasattr(model, 'predict_proba'):
-            probabilities = model.predict_proba(features)
-            result['probabilities'] = probabilities.tolist()
-            result['confidence'] = float(np.max(probabilities))
-        
-        return jsonify(result)
+        if probabilities is not None:
+            result['probabilities'] = probabilities
+            result['confidence'] = np.max(probabilities)
+
+        return ojsonify(result)
         
     except Exception as e:
         return jsonify({
@@ -262,29 +447,31 @@ def predict_batch(model_name):
         if not data or 'samples' not in data:
             return jsonify({'error': 'Please provide "samples" as array of arrays'}), 400
         
-        samples = np.array(data['samples'])
+        raw_samples = data['samples']
+        if not raw_samples:
+            return jsonify({'error': 'Please provide "samples" as array of arrays'}), 400
+
+        samples = _request_buffer(len(raw_samples), len(raw_samples[0]))
+        samples[:] = raw_samples
         model = MODELS[model_name]
         
         # Apply scaling if scaler is available for this model
-        if model_name in SCALERS:
-            scaler = SCALERS[model_name]
-            samples = scaler.transform(samples)
-            
+        samples = _scale_inplace(model_name, samples)
+
         predictions = model.predict(samples)
         
         result = {
             'model': model_name,
-            'predictions': predictions.tolist(),
+            'predictions': predictions,
             'num_samples': len(samples),
             'success': True
         }
-        
-        # Add probabilities for classification models
-        if hasattr(model, 'predict_proba'):
-            probabilities = model.predict_proba(samples)
-            result['probabilities'] = probabilities.tolist()
-        
-        return jsonify(result)
+
+        # Add probabilities for classification models (opt-in)
+        if _wants_proba(data) and hasattr(model, 'predict_proba'):
+            result['probabilities'] = model.predict_proba(samples)
+
+        return ojsonify(result)
         
     except Exception as e:
         return jsonify({
@@ -309,43 +496,40 @@ def predict_quality_detailed():
         
         # Handle different input formats
         if 'features' in data:
-            features = np.array(data['features']).reshape(1, -1)
+            values = data['features']
         elif 'data' in data:
-            if isinstance(data['data'], list):
-                features = np.array(data['data']).reshape(1, -1)
-            else:
-                features = np.array(list(data['data'].values())).reshape(1, -1)
+            values = data['data'] if isinstance(data['data'], list) else list(data['data'].values())
         else:
             return jsonify({'error': 'Please provide data as "features" or "data" key'}), 400
-        
+
         model = MODELS['quality']
-        original_features = features.copy()
-        
-        # Apply scaling
-        if 'quality' in SCALERS:
-            scaler = SCALERS['quality']
-            features = scaler.transform(features)
+        # Echo the request list back directly instead of copying the array
+        original_features = [values]
+        features = np.array(values, dtype=np.float32).reshape(1, -1)
+
+        # Apply scaling (fused in place)
+        features = _scale_inplace('quality', features)
         
         prediction = model.predict(features)
         
         result = {
             'model': 'quality',
-            'prediction': prediction.tolist(),
-            'original_features': original_features.tolist(),
-            'scaled_features': features.tolist(),
+            'prediction': prediction,
+            'original_features': original_features,
+            'scaled_features': features,
             'prediction_label': 'High Quality' if prediction[0] == 1 else 'Low Quality',
             'input_shape': features.shape,
             'success': True
         }
-        
+
         # Add probabilities if available
         if hasattr(model, 'predict_proba'):
             probabilities = model.predict_proba(features)
-            result['probabilities'] = probabilities.tolist()
-            result['confidence'] = float(np.max(probabilities))
-            result['quality_score'] = float(probabilities[0][1])  # Probability of high quality
-        
-        return jsonify(result)
+            result['probabilities'] = probabilities
+            result['confidence'] = np.max(probabilities)
+            result['quality_score'] = probabilities[0][1]  # Probability of high quality
+
+        return ojsonify(result)
         
     except Exception as e:
         return jsonify({
@@ -1,14 +1,19 @@
 import pandas as pd
+import numpy as np
 import joblib
 from preprocess import preprocess_scan_logs
 
 # Load pre-trained model
 model = joblib.load("../counterfeit_detection_ml/models/isolation_forest.pkl")
 
+FEATURE_COLS = ['lat', 'lon', 'scan_interval_hours', 'distance_km', 'retailer_type']
+
 def detect_counterfeit(filepath):
     df = preprocess_scan_logs(filepath)
-    X = df[['lat', 'lon', 'scan_interval_hours', 'distance_km', 'retailer_type']]
-    
+    # Stack the feature columns into one contiguous float32 matrix so sklearn
+    # does not re-copy the frame through object-dtype coercion
+    X = np.column_stack([df[c].to_numpy(dtype=np.float32) for c in FEATURE_COLS])
+
     df['anomaly_score'] = model.decision_function(X)
     df['is_suspicious'] = model.predict(X) == -1
     
@@ -22,7 +22,8 @@ model = joblib.load(MODEL_PATH)
 print(f"🔍 Loading data from {DATA_PATH}")
 df_processed = preprocess_scan_logs(DATA_PATH)
 
-X = df_processed[['lat', 'lon', 'scan_interval_hours', 'distance_km', 'retailer_type']]
+FEATURE_COLS = ['lat', 'lon', 'scan_interval_hours', 'distance_km', 'retailer_type']
+X = np.ascontiguousarray(df_processed[FEATURE_COLS].to_numpy(dtype=np.float32))
 
 # -------------------------------
 # 3. Predict on Unseen Data
@@ -33,7 +34,7 @@ y_pred = model.predict(X)   # -1 = anomaly, 1 = normal
 # -------------------------------
 # 4. Report Anomaly Ratio
 # -------------------------------
-anomaly_ratio = np.mean(y_pred == -1)
+anomaly_ratio = (y_pred == -1).mean()
 print(f"⚠️ Anomalies detected: {anomaly_ratio:.2%} of total scans")
 
 # -------------------------------
@@ -57,7 +58,7 @@ if {"distance_km", "scan_interval_hours"}.issubset(df_processed.columns):
     ).astype(int)
 
     y_true = df_processed["label"].values
-    y_pred_binary = np.array([1 if p == -1 else 0 for p in y_pred])  # 1=counterfeit, 0=normal
+    y_pred_binary = (y_pred == -1).astype(np.int8)  # 1=counterfeit, 0=normal
 
     print("\n📊 Rule-based Evaluation:")
     print(confusion_matrix(y_true, y_pred_binary))
@@ -1,26 +1,58 @@
-import pandas as pd
-from geopy.distance import geodesic
-
-def preprocess_scan_logs(filepath):
-    df = pd.read_csv(filepath, parse_dates=['timestamp'])
-    df = df.sort_values(['batch_id', 'timestamp'])
-    
-    # Time since last scan for same batch
-    df['prev_time'] = df.groupby('batch_id')['timestamp'].shift(1)
-    df['scan_interval_hours'] = (df['timestamp'] - df['prev_time']).dt.total_seconds() / 3600
-    df['scan_interval_hours'].fillna(df['scan_interval_hours'].max(), inplace=True)
-    
-    # Distance from previous scan
-    def compute_distance(row):
-        if pd.isna(row['prev_time']):
-            return 0
-        prev = df[(df['batch_id'] == row['batch_id']) & (df['timestamp'] == row['prev_time'])].iloc[0]
-        return geodesic((row['lat'], row['lon']), (prev['lat'], prev['lon'])).km
-    
-    df['distance_km'] = df.apply(compute_distance, axis=1)
-    
-    # Retailer type: assume R1-R5 are registered
-    registered_retailers = ["R1", "R2", "R3", "R4", "R5"]
-    df['retailer_type'] = df['retailer_id'].apply(lambda x: 1 if x in registered_retailers else 0)
-    
-    return df[['lat', 'lon', 'scan_interval_hours', 'distance_km', 'retailer_type', 'batch_id']]
+import pandas as pd
+import numpy as np
+
+from preprocess_numba import haversine_km
+
+SCAN_LOG_DTYPES = {'lat': 'float32', 'lon': 'float32'}
+REGISTERED_RETAILERS = frozenset(["R1", "R2", "R3", "R4", "R5"])
+
+def _read_scan_logs(src):
+    """Parse scan logs (path or file-like stream) with the multithreaded
+    pyarrow engine and explicit dtypes, falling back to the C engine when
+    pyarrow is unavailable."""
+    try:
+        return pd.read_csv(src, engine='pyarrow', parse_dates=['timestamp'],
+                           dtype=SCAN_LOG_DTYPES)
+    except (ImportError, ValueError):
+        if hasattr(src, 'seek'):
+            src.seek(0)  # the failed attempt may have consumed the stream
+        return pd.read_csv(src, parse_dates=['timestamp'], dtype=SCAN_LOG_DTYPES)
+
+def preprocess_scan_logs(src):
+    """Build scan-log features from a CSV path/stream or an already-parsed
+    DataFrame (JSON endpoints pass their frame directly, no CSV round-trip)."""
+    if isinstance(src, pd.DataFrame):
+        return preprocess_scan_logs_df(src)
+    return preprocess_scan_logs_df(_read_scan_logs(src))
+
+def preprocess_scan_logs_df(df):
+    """Feature extraction over an in-memory scan-log DataFrame."""
+    if not np.issubdtype(df['timestamp'].dtype, np.datetime64):
+        try:
+            df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', cache=True)
+        except ValueError:
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = df.sort_values(['batch_id', 'timestamp'])
+
+    # Time since last scan for same batch
+    df['prev_time'] = df.groupby('batch_id')['timestamp'].shift(1)
+    # Fill first-scan NaNs with the max interval directly on the numpy buffer;
+    # avoids the deprecated inplace fillna and its dtype upcast/copy
+    intervals = ((df['timestamp'] - df['prev_time']).dt.total_seconds() / 3600).to_numpy()
+    np.nan_to_num(intervals, copy=False, nan=np.nanmax(intervals))
+    df['scan_interval_hours'] = intervals
+
+    # Distance from previous scan: shift lat/lon within each batch and
+    # compute haversine over whole arrays instead of per-row geodesic calls
+    df['prev_lat'] = df.groupby('batch_id')['lat'].shift(1)
+    df['prev_lon'] = df.groupby('batch_id')['lon'].shift(1)
+    distance = haversine_km(
+        df['lat'].values, df['lon'].values,
+        df['prev_lat'].values, df['prev_lon'].values
+    )
+    df['distance_km'] = np.nan_to_num(distance, nan=0.0)  # first scan per batch
+
+    # Retailer type: assume R1-R5 are registered (vectorized membership test)
+    df['retailer_type'] = df['retailer_id'].isin(REGISTERED_RETAILERS).to_numpy(dtype=np.int8)
+
+    return df[['lat', 'lon', 'scan_interval_hours', 'distance_km', 'retailer_type', 'batch_id']]
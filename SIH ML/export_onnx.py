@@ -0,0 +1,41 @@
+"""
+One-off export of the trained Isolation Forests to ONNX.
+The API server prefers the .onnx files when onnxruntime is installed;
+its tree-ensemble kernels traverse the forest in branchless, vectorized
+loops instead of sklearn's Python-orchestrated prediction.
+
+Usage: python export_onnx.py
+Requires: pip install skl2onnx onnxruntime
+"""
+
+from pathlib import Path
+
+import joblib
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
+
+HERE = Path(__file__).resolve().parent
+
+EXPORTS = [
+    # (trained model, onnx target, number of features)
+    (HERE / 'counterfeit_detection_ml' / 'models' / 'isolation_forest.pkl',
+     HERE / 'counterfeit_detection_ml' / 'models' / 'isolation_forest.onnx', 5),
+    (HERE / 'harvest_anomaly_detection' / 'models' / 'isolation_forest.joblib',
+     HERE / 'harvest_anomaly_detection' / 'models' / 'isolation_forest.onnx', 3),
+]
+
+def export_model(model_path, onnx_path, n_features):
+    model = joblib.load(model_path)
+    onx = convert_sklearn(
+        model,
+        initial_types=[('X', FloatTensorType([None, n_features]))]
+    )
+    onnx_path.write_bytes(onx.SerializeToString())
+    print(f"✅ Exported {model_path.name} -> {onnx_path.name}")
+
+if __name__ == '__main__':
+    for model_path, onnx_path, n_features in EXPORTS:
+        if model_path.exists():
+            export_model(model_path, onnx_path, n_features)
+        else:
+            print(f"⚠️  Skipping {model_path} - model not found")
@@ -1,51 +1,101 @@
+import hashlib
+import os
+import tempfile
+
 import pandas as pd
 import numpy as np
+import joblib
 from sklearn.preprocessing import StandardScaler
 from .rules import rule_based_anomalies_weekly
+from .utils import load_harvest_data
 
-def detect_weekly_anomalies(df_harvest, herb_rules_df, iso_forest):
-    """
-    Detect weekly anomalies using both rule-based checks and Isolation Forest.
-    Returns a DataFrame with:
-    - weekly aggregated features
-    - rule anomalies
-    - Isolation Forest anomalies
-    - final anomaly flag
-    """
+WEEKLY_SCALER_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', 'weekly_scaler.joblib'
+)
+_weekly_scaler = None
+
+def _load_weekly_scaler():
+    """Lazily load the scaler persisted at training time (if present)."""
+    global _weekly_scaler
+    if _weekly_scaler is None and os.path.exists(WEEKLY_SCALER_FILE):
+        _weekly_scaler = joblib.load(WEEKLY_SCALER_FILE)
+        # Contiguous float32 params keep the transform a single fused pass
+        _weekly_scaler.mean_ = np.ascontiguousarray(_weekly_scaler.mean_, dtype=np.float32)
+        _weekly_scaler.scale_ = np.ascontiguousarray(_weekly_scaler.scale_, dtype=np.float32)
+    return _weekly_scaler
 
-    # Add week/year columns
+def aggregate_weekly(df_harvest):
+    """Aggregate raw harvest logs into weekly totals per farmer and plant."""
     df_harvest['week'] = df_harvest['timestamp'].dt.isocalendar().week
     df_harvest['year'] = df_harvest['timestamp'].dt.isocalendar().year
 
-    # Weekly aggregation
     weekly_harvest = df_harvest.groupby(['farmer_id', 'plant_type', 'year', 'week']).agg({
         'quantity_harvested': 'sum',
         'region_id': 'first',
         'geo_lat': 'mean',
         'geo_lon': 'mean'
     }).reset_index()
+    return weekly_harvest
+
+def aggregate_weekly_cached(csv_path):
+    """
+    Weekly aggregation with a Parquet cache keyed by the CSV's path + mtime.
+    Repeated runs on an unchanged file skip the CSV parse and groupby entirely.
+    """
+    key = hashlib.md5(
+        f'{os.path.abspath(csv_path)}:{os.path.getmtime(csv_path)}'.encode()
+    ).hexdigest()
+    cache_file = os.path.join(tempfile.gettempdir(), f'weekly_{key}.parquet')
+
+    if os.path.exists(cache_file):
+        return pd.read_parquet(cache_file)
+
+    weekly_harvest = aggregate_weekly(load_harvest_data(csv_path))
+    try:
+        weekly_harvest.to_parquet(cache_file)
+    except Exception:
+        pass  # cache is best-effort; parquet support may be missing
+    return weekly_harvest
+
+def detect_weekly_anomalies(df_harvest, herb_rules_df, iso_forest, scaler=None):
+    """
+    Detect weekly anomalies using both rule-based checks and Isolation Forest.
+    Returns a DataFrame with:
+    - weekly aggregated features
+    - rule anomalies
+    - Isolation Forest anomalies
+    - final anomaly flag
+    """
+
+    # Weekly aggregation
+    weekly_harvest = aggregate_weekly(df_harvest)
 
-    # Rule-based anomalies
-    weekly_harvest['rule_anomalies'] = weekly_harvest.apply(
-        lambda row: rule_based_anomalies_weekly(row, herb_rules_df), axis=1
-    )
+    # Rule-based anomalies (vectorized merge against herb rules)
+    weekly_harvest['rule_anomalies'] = rule_based_anomalies_weekly(weekly_harvest, herb_rules_df)
 
-    # Features for Isolation Forest
+    # Features for Isolation Forest as a contiguous float32 matrix
     features = ['quantity_harvested', 'geo_lat', 'geo_lon']
-    X = weekly_harvest[features].copy()
-    X['quantity_harvested'] = np.log1p(X['quantity_harvested'])  # log scaling
+    X = np.ascontiguousarray(weekly_harvest[features].to_numpy(dtype=np.float32))
+    X[:, 0] = np.log1p(X[:, 0])  # log-scale quantity_harvested
 
-    # Standard scaling
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    # Standard scaling with the training-time scaler; refitting on the
+    # incoming batch would both cost an extra pass and skew predictions
+    if scaler is None:
+        scaler = _load_weekly_scaler()
+    if scaler is not None:
+        X_scaled = scaler.transform(X)
+    else:
+        # No persisted scaler available - fall back to fitting on the batch
+        X_scaled = StandardScaler().fit_transform(X)
 
     # ML-based anomalies using pre-trained Isolation Forest
     weekly_harvest['iforest_anomaly'] = iso_forest.predict(X_scaled)
     weekly_harvest['iforest_anomaly'] = weekly_harvest['iforest_anomaly'].map({1: 0, -1: 1})
 
-    # Final anomaly flag: rule OR ML
-    weekly_harvest['final_anomaly'] = weekly_harvest.apply(
-        lambda row: 1 if (len(row['rule_anomalies']) > 0 or row['iforest_anomaly'] == 1) else 0, axis=1
-    )
+    # Final anomaly flag: rule OR ML (vectorized boolean ops)
+    has_rule = weekly_harvest['rule_anomalies'].str.len().to_numpy() > 0
+    weekly_harvest['final_anomaly'] = (
+        has_rule | (weekly_harvest['iforest_anomaly'].to_numpy() == 1)
+    ).astype(np.int8)
 
     return weekly_harvest
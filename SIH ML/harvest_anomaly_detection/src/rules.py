@@ -1,19 +1,43 @@
-import pandas as pd
-
-def rule_based_anomalies_weekly(row, herb_rules_df):
-    anomalies = []
-    
-    herb_info = herb_rules_df[herb_rules_df['plant_type'] == row['plant_type']]
-    if not herb_info.empty:
-        max_qty = herb_info['max_quantity_per_week'].values[0]
-        allowed_regions = herb_info['approved_regions'].values[0]
-        
-        if row['quantity_harvested'] > max_qty:
-            anomalies.append(f'Over Quantity ({row["plant_type"]})')
-        
-        if row['region_id'] not in allowed_regions:
-            anomalies.append(f'Outside Approved Region ({row["plant_type"]})')
-    else:
-        anomalies.append('Unknown Plant Type')
-    
-    return anomalies
+import pandas as pd
+import numpy as np
+
+def rule_based_anomalies_weekly(weekly_df, herb_rules_df):
+    """
+    Vectorized rule checks over the weekly aggregated harvest frame.
+    Plant types map through dict indexes precomputed at rules load time, so
+    each check is an O(1) lookup instead of a join or per-row filtering;
+    returns a Series of per-row anomaly lists aligned with weekly_df.
+    """
+    # Prefer the per-plant indexes built once in load_herb_rules; fall back
+    # to deriving them here for rule frames loaded some other way
+    region_index = herb_rules_df.attrs.get('region_index')
+    max_quantity = herb_rules_df.attrs.get('max_quantity')
+    if region_index is None or max_quantity is None:
+        rules = herb_rules_df.drop_duplicates('plant_type')
+        region_index = dict(zip(rules['plant_type'], rules['approved_regions']))
+        max_quantity = dict(zip(rules['plant_type'],
+                                rules['max_quantity_per_week'].astype(float)))
+
+    plants = weekly_df['plant_type']
+    max_q = plants.map(max_quantity).to_numpy(dtype=float)  # NaN for unknown
+    known = ~np.isnan(max_q)
+    over_qty = weekly_df['quantity_harvested'].to_numpy() > max_q
+    outside_region = np.array([
+        k and (region not in regions)
+        for k, region, regions in zip(known, weekly_df['region_id'],
+                                      plants.map(region_index))
+    ], dtype=bool)
+
+    anomalies = []
+    for plant, k, over, outside in zip(plants, known, over_qty, outside_region):
+        row_anomalies = []
+        if not k:
+            row_anomalies.append('Unknown Plant Type')
+        else:
+            if over:
+                row_anomalies.append(f'Over Quantity ({plant})')
+            if outside:
+                row_anomalies.append(f'Outside Approved Region ({plant})')
+        anomalies.append(row_anomalies)
+
+    return pd.Series(anomalies, index=weekly_df.index)
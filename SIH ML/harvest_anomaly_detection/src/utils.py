@@ -1,14 +1,45 @@
+import json
 import pandas as pd
-import ast
 
-def load_harvest_data(filepath):
-    df = pd.read_csv(filepath)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+def _read_harvest_csv(src):
+    """Parse harvest logs (path or file-like stream) with the multithreaded
+    pyarrow engine, falling back to the C engine when pyarrow is unavailable."""
+    try:
+        return pd.read_csv(src, engine='pyarrow', parse_dates=['timestamp'])
+    except (ImportError, ValueError):
+        if hasattr(src, 'seek'):
+            src.seek(0)  # the failed attempt may have consumed the stream
+        return pd.read_csv(src)
+
+def load_harvest_data(src):
+    """Load harvest logs from a CSV path or an already-built DataFrame."""
+    df = src if isinstance(src, pd.DataFrame) else _read_harvest_csv(src)
+    if not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+        # ISO8601 takes the vectorized C parse path; only fall back to the
+        # slow dateutil inference for non-ISO inputs
+        try:
+            df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', cache=True)
+        except ValueError:
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
     return df
 
 def load_herb_rules(filepath):
     herb_rules = pd.read_csv(filepath)
-    herb_rules['approved_regions'] = herb_rules['approved_regions'].apply(
-        lambda x: set(ast.literal_eval(x)) if isinstance(x, str) else set(x)
+    # Normalize the serialized lists to JSON in one vectorized str.replace,
+    # then parse with the C json decoder instead of per-row ast.literal_eval
+    regions = herb_rules['approved_regions']
+    as_json = regions.astype(str).str.replace("'", '"', regex=False)
+    herb_rules['approved_regions'] = [
+        frozenset(json.loads(x)) if isinstance(raw, str) else frozenset(raw)
+        for x, raw in zip(as_json, regions)
+    ]
+    # Per-plant lookup indexes built once at load; the rule checks then map
+    # plant_type straight to its limits instead of re-joining every call
+    unique_rules = herb_rules.drop_duplicates('plant_type')
+    herb_rules.attrs['region_index'] = dict(
+        zip(unique_rules['plant_type'], unique_rules['approved_regions'])
+    )
+    herb_rules.attrs['max_quantity'] = dict(
+        zip(unique_rules['plant_type'], unique_rules['max_quantity_per_week'].astype(float))
     )
     return herb_rules
@@ -1,40 +1,70 @@
-from fastapi import FastAPI
-import joblib
-import pandas as pd
-
-# Load model + scaler
-model = joblib.load("quality_model.pkl")
-scaler = joblib.load("scaler.pkl")
-
-app = FastAPI()
-
-@app.get("/")
-def home():
-    return {"message": "Quality Test Prediction API is running 🚀"}
-
-@app.post("/predict/")
-def predict(
-    temperature: float,
-    humidity: float,
-    soil_nitrogen: float,
-    rainfall: float,
-    region: int,
-    harvest_month: int
-):
-    # Make dataframe from input
-    features = pd.DataFrame([{
-        "temperature": temperature,
-        "humidity": humidity,
-        "soil_nitrogen": soil_nitrogen,
-        "rainfall": rainfall,
-        "region": region,
-        "harvest_month": harvest_month
-    }])
-    
-    # Scale features
-    scaled = scaler.transform(features)
-    
-    # Predict
-    prediction = model.predict(scaled)[0]
-    
-    return {"prediction": int(prediction), "meaning": "Pass ✅" if prediction==1 else "Fail ❌"}
+import threading
+
+from fastapi import FastAPI
+import joblib
+import numpy as np
+
+# Model + scaler are loaded lazily so worker startup is not serialized on
+# disk I/O and unpickling; the first request (or the startup hook) warms them
+_model = None
+_scaler = None
+_load_lock = threading.Lock()
+
+def get_model():
+    global _model
+    if _model is None:
+        with _load_lock:
+            if _model is None:
+                _model = joblib.load("quality_model.pkl")
+    return _model
+
+def get_scaler():
+    global _scaler
+    if _scaler is None:
+        with _load_lock:
+            if _scaler is None:
+                _scaler = joblib.load("scaler.pkl")
+    return _scaler
+
+# One reusable 1x6 input row per thread; building a DataFrame (or even a
+# fresh array) per request costs more than this model's inference
+_local = threading.local()
+
+def _input_buffer():
+    buf = getattr(_local, "buf", None)
+    if buf is None:
+        buf = _local.buf = np.empty((1, 6), dtype=np.float64)
+    return buf
+
+app = FastAPI()
+
+@app.on_event("startup")
+def warm_models():
+    # Warm in the background so the listener socket opens immediately
+    threading.Thread(target=lambda: (get_model(), get_scaler()), daemon=True).start()
+
+@app.get("/")
+def home():
+    return {"message": "Quality Test Prediction API is running 🚀"}
+
+@app.post("/predict/")
+def predict(
+    temperature: float,
+    humidity: float,
+    soil_nitrogen: float,
+    rainfall: float,
+    region: int,
+    harvest_month: int
+):
+    # Fill the pooled buffer in place (column order matches training)
+    features = _input_buffer()
+    features[0, :] = (temperature, humidity, soil_nitrogen,
+                      rainfall, region, harvest_month)
+
+    # Scale features
+    scaled = get_scaler().transform(features)
+
+    # Predict
+    prediction = get_model().predict(scaled)[0]
+
+    return {"prediction": int(prediction), "meaning": "Pass ✅" if prediction==1 else "Fail ❌"}